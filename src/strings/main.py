@@ -4,12 +4,9 @@ License: 3-clause BSD (see https://opensource.org/licenses/BSD-3-Clause)
 Author: Hubert Tournier
 """
 
-import getopt
-import logging
+# Only lightweight modules are imported here, in order to start fast.
+# The other ones are imported when they are needed
 import os
-import shlex
-import struct
-import signal
 import sys
 
 # Version string used by the what(1) and ident(1) commands:
@@ -19,16 +16,19 @@ ID = "@(#) $Id: strings - print the strings of printable characters in files v1.
 parameters = {
     # File parameters:
     "Encoding": "s", # between "s", "S", "l", "b", "L", "B", "u"
+    "All alignments": False, # for the "l", "b", "L", "B" encodings
     "Scan entire file": False,
     "Target": "", # "ELF", "a.out", "COFF", etc.
     "Offset": 0,
     "Length": sys.maxsize,
+    "Entropy threshold": 0, # in bits per byte. 0 = scan all blocks
 
     # String parameters:
     "Include backspaces": False,
     "Include whitespaces": False,
     "String termination": [], # empty list = all unprintable characters
     "Minimum length": 4,
+    "Maximum length": 1048576, # longer strings are output in pieces
 
     # Display parameters:
     "Print filename": False,
@@ -39,13 +39,60 @@ parameters = {
     "Command flavour": "PNU",
 }
 
+# Debugging state, the logging module being only loaded when it's used:
+_debugging = {
+    "Enabled": "STRINGS_DEBUG" in os.environ,
+    "Program name": "strings",
+    "Logging module": None,
+}
+
+# Size of the blocks of bytes read at once from files or streams:
+_BLOCK_SIZE = 1024 * 1024
+
+# Size of the blocks of bytes whose entropy is measured:
+_ENTROPY_BLOCK_SIZE = 4096
+
+# Initial size of the buffers of strings in the making, in characters:
+_STRING_BUFFER_SIZE = 4096
+
+# Tables of the printable single byte values, built on first use for each set of options:
+_printable_tables = {}
+
 
 ################################################################################
 def _initialize_debugging(program_name):
     """Debugging set up"""
-    console_log_format = program_name + ": %(levelname)s: %(message)s"
-    logging.basicConfig(format=console_log_format, level=logging.DEBUG)
-    logging.disable(logging.INFO)
+    _debugging["Program name"] = program_name
+
+
+################################################################################
+def _logging():
+    """Return the logging module, importing and setting it up on first use"""
+    if _debugging["Logging module"] is None:
+        import logging
+
+        console_log_format = _debugging["Program name"] + ": %(levelname)s: %(message)s"
+        logging.basicConfig(format=console_log_format, level=logging.DEBUG)
+        if not _debugging["Enabled"]:
+            logging.disable(logging.INFO)
+        _debugging["Logging module"] = logging
+
+    return _debugging["Logging module"]
+
+
+################################################################################
+def _enable_debugging():
+    """Enable debug mode"""
+    _debugging["Enabled"] = True
+    if _debugging["Logging module"] is not None:
+        _debugging["Logging module"].disable(_debugging["Logging module"].NOTSET)
+
+
+################################################################################
+def _debug(message, *arguments):
+    """Log a debug message, without loading the logging module when not in debug mode"""
+    if _debugging["Enabled"]:
+        _logging().debug(message, *arguments)
 
 
 ################################################################################
@@ -213,8 +260,9 @@ def _display_help():
         print("  --         Options processing terminator", file=sys.stderr)
     else: # PNU
         print("usage: strings [--debug] [-h|--help|-?] [-v|-V|--version]", file=sys.stderr)
-        print("       [-a|--all] [-D|--delimiters LIST][-e|--encoding CHAR]", file=sys.stderr)
-        print("       [-f|--print-file-name] [-L|--length NUM]", file=sys.stderr)
+        print("       [-a|--all] [-A|--all-alignments] [-D|--delimiters LIST]", file=sys.stderr)
+        print("       [-e|--encoding CHAR] [-E|--entropy NUM] [-f|--print-file-name]", file=sys.stderr)
+        print("       [-L|--length NUM] [-M|--max-length NUM]", file=sys.stderr)
         print("       [-m NUM|-n NUM|--bytes NUM|-NUM] [-o] [-O|--offset NUM]", file=sys.stderr)
         print("       [-s|--output-separator STRING] [-S|--split-lines]", file=sys.stderr)
         print("       [-t|--radix CHAR] [-w|--include-all-whitespace] [@file]", file=sys.stderr)
@@ -224,14 +272,26 @@ def _display_help():
             file=sys.stderr
         )
         print("  -a|--all                      Scan the entire file for strings", file=sys.stderr)
+        print(
+            "  -A|--all-alignments           Search wide characters at all byte alignments",
+            file=sys.stderr
+        )
         print(
             "  -D|--delimiters LIST          Use the ':' separated list of character values",
             file=sys.stderr
         )
         print("                                as delimiters", file=sys.stderr)
         print("  -e|--encoding CHAR            Select the character encoding to use", file=sys.stderr)
+        print(
+            "  -E|--entropy NUM              Skip blocks with an entropy above NUM bits per byte",
+            file=sys.stderr
+        )
         print("  -f|--print-file-name          Print the file name before each string", file=sys.stderr)
         print("  -L|--length NUM               Read NUM bytes from offset", file=sys.stderr)
+        print(
+            "  -M|--max-length NUM           Print strings longer than NUM characters in pieces",
+            file=sys.stderr
+        )
         print(
             "  -m|-n|--bytes NUM | -NUM      Print sequences with NUM or more characters",
             file=sys.stderr
@@ -264,19 +324,13 @@ def _display_help():
 
 
 ################################################################################
-def _handle_interrupts(signal_number, current_stack_frame):
+def _handle_interrupts():
     """Prevent SIGINT signals from displaying an ugly stack trace"""
     print(" Interrupted!\n", file=sys.stderr)
     _display_help()
     sys.exit(0)
 
 
-################################################################################
-def _handle_signals():
-    """Process signals"""
-    signal.signal(signal.SIGINT, _handle_interrupts)
-
-
 ################################################################################
 def _process_environment_variables():
     """Process environment variables"""
@@ -285,7 +339,7 @@ def _process_environment_variables():
     # pylint: enable=C0103
 
     if "STRINGS_DEBUG" in os.environ:
-        logging.disable(logging.NOTSET)
+        _enable_debugging()
 
     if "FLAVOUR" in os.environ:
         parameters["Command flavour"] = os.environ["FLAVOUR"].lower()
@@ -314,16 +368,18 @@ def _process_environment_variables():
     elif parameters["Command flavour"] in ("PNU", "bsd", "bsd:freebsd", "gnu", "gnu:linux", "linux"):
         pass
     else:
-        logging.critical("Unimplemented command FLAVOUR: %s", parameters["Command flavour"])
+        _logging().critical("Unimplemented command FLAVOUR: %s", parameters["Command flavour"])
         sys.exit(1)
 
-    logging.debug("_process_environment_variables(): parameters:")
-    logging.debug(parameters)
+    _debug("_process_environment_variables(): parameters:")
+    _debug(parameters)
 
 
 ################################################################################
 def insert_file(part):
     """Return a command line argument with recursively expanded @file options"""
+    import shlex
+
     new_parts = []
     filename = part[1:]
     if os.path.isfile(filename):
@@ -352,6 +408,59 @@ def _read_option_files(command_line):
     return new_argv
 
 
+################################################################################
+def _parse_options(arguments, character_options, string_options):
+    """Return the (option, argument) pairs and remaining arguments of a command line, like getopt()"""
+    # The getopt module loads gettext, re and enum, which would triple our start up time
+    options = []
+    while arguments and arguments[0].startswith("-") and arguments[0] != "-":
+        argument = arguments.pop(0)
+        if argument == "--":
+            break
+
+        if argument.startswith("--"):
+            name, value = argument[2:], None
+            if "=" in name:
+                name, value = name.split("=", 1)
+            candidates = [option for option in string_options if option.startswith(name)]
+            if name in candidates:
+                candidates = [name]
+            elif name + "=" in candidates:
+                candidates = [name + "="]
+            if not candidates:
+                raise ValueError("option --{} not recognized".format(name))
+            if len(candidates) > 1:
+                raise ValueError("option --{} not a unique prefix".format(name))
+            name = candidates[0]
+            if name.endswith("="):
+                name = name[:-1]
+                if value is None:
+                    if not arguments:
+                        raise ValueError("option --{} requires argument".format(name))
+                    value = arguments.pop(0)
+            elif value is not None:
+                raise ValueError("option --{} must not have an argument".format(name))
+            options.append(("--" + name, value or ""))
+            continue
+
+        letters = argument[1:]
+        while letters:
+            letter, letters = letters[0], letters[1:]
+            index = character_options.find(letter)
+            if letter == ":" or index == -1:
+                raise ValueError("option -{} not recognized".format(letter))
+            value = ""
+            if character_options.startswith(":", index + 1):
+                if not letters:
+                    if not arguments:
+                        raise ValueError("option -{} requires argument".format(letter))
+                    letters = arguments.pop(0)
+                value, letters = letters, ""
+            options.append(("-" + letter, value))
+
+    return options, arguments
+
+
 ################################################################################
 def _process_command_line():
     """Process command line options"""
@@ -422,16 +531,19 @@ def _process_command_line():
             "version",
         ]
     else: # PNU
-        character_options = "1234567890aD:e:fhL:m:n:oO:s:St:vVw?"
+        character_options = "1234567890aAD:e:E:fhL:M:m:n:oO:s:St:vVw?"
         string_options = [
             "all",
+            "all-alignments",
             "bytes=",
             "debug",
             "delimiters=",
             "encoding=",
+            "entropy=",
             "help",
             "include-all-whitespace",
             "length=",
+            "max-length=",
             "offset=",
             "output-separator=",
             "print-file-name",
@@ -441,11 +553,9 @@ def _process_command_line():
         ]
 
     try:
-        options, remaining_arguments = getopt.getopt(
-            sys.argv[1:], character_options, string_options
-        )
-    except getopt.GetoptError as error:
-        logging.critical("Syntax error: %s", error)
+        options, remaining_arguments = _parse_options(sys.argv[1:], character_options, string_options)
+    except ValueError as error:
+        _logging().critical("Syntax error: %s", error)
         _display_help()
         sys.exit(1)
 
@@ -453,18 +563,21 @@ def _process_command_line():
     for option, argument in options:
 
         if option == "--debug":
-            logging.disable(logging.NOTSET)
+            _enable_debugging()
 
         elif option in ("-a", "--all"):
             parameters["Scan entire file"] = True
 
+        elif option in ("-A", "--all-alignments"):
+            parameters["All alignments"] = True
+
         elif option in ("-d", "--data"):
             if parameters["Command flavour"] in ("unix", "unix:v10"):
-                logging.critical(
+                _logging().critical(
                     "Looking for strings in the data segment of an a.out object file is not implemented"
                 )
             elif parameters["Command flavour"] in ("gnu", "gnu:linux", "linux"):
-                logging.critical(
+                _logging().critical(
                     "Looking for strings in the initialized & loaded data sections of a file is not implemented"
                 )
             sys.exit(1)
@@ -474,14 +587,24 @@ def _process_command_line():
                 try:
                     parameters["String termination"].append(int(delimiter))
                 except ValueError:
-                    logging.critical("Invalid -D argument: list items must be integers")
+                    _logging().critical("Invalid -D argument: list items must be integers")
                     sys.exit(1)
 
         elif option in ("-e", "--encoding"):
             if argument in ("s", "S", "l", "b", "L", "B", "u"):
                 parameters["Encoding"] = argument
             else:
-                logging.critical("Invalid -e argument: must be one of {s, S, l, b, L, B, u}")
+                _logging().critical("Invalid -e argument: must be one of {s, S, l, b, L, B, u}")
+                sys.exit(1)
+
+        elif option in ("-E", "--entropy"):
+            try:
+                parameters["Entropy threshold"] = float(argument)
+            except ValueError:
+                _logging().critical("Invalid -E argument: must be a number")
+                sys.exit(1)
+            if parameters["Entropy threshold"] <= 0 or parameters["Entropy threshold"] > 8:
+                _logging().critical("Invalid -E argument: must be a number between 0 and 8")
                 sys.exit(1)
 
         elif option in ("-f", "--print-file-name"):
@@ -497,20 +620,30 @@ def _process_command_line():
             try:
                 parameters["Length"] = int(argument)
             except ValueError:
-                logging.critical("Invalid -L argument: must be an integer")
+                _logging().critical("Invalid -L argument: must be an integer")
                 sys.exit(1)
             if parameters["Minimum length"] < 1:
-                logging.critical("Invalid -L argument: must be a positive integer")
+                _logging().critical("Invalid -L argument: must be a positive integer")
+                sys.exit(1)
+
+        elif option in ("-M", "--max-length"):
+            try:
+                parameters["Maximum length"] = int(argument)
+            except ValueError:
+                _logging().critical("Invalid -M argument: must be an integer")
+                sys.exit(1)
+            if parameters["Maximum length"] < 1:
+                _logging().critical("Invalid -M argument: must be a positive integer")
                 sys.exit(1)
 
         elif option in ("-m", "-n", "--bytes"):
             try:
                 parameters["Minimum length"] = int(argument)
             except ValueError:
-                logging.critical("Invalid -n argument: must be an integer")
+                _logging().critical("Invalid -n argument: must be an integer")
                 sys.exit(1)
             if parameters["Minimum length"] < 1:
-                logging.critical("Invalid -n argument: must be a positive integer")
+                _logging().critical("Invalid -n argument: must be a positive integer")
                 sys.exit(1)
 
         elif option == "-o":
@@ -522,15 +655,15 @@ def _process_command_line():
             try:
                 parameters["Offset"] = int(argument)
             except ValueError:
-                logging.critical("Invalid -O argument: must be an integer")
+                _logging().critical("Invalid -O argument: must be an integer")
                 sys.exit(1)
             if parameters["Minimum length"] < 1:
-                logging.critical("Invalid -O argument: must be a positive integer")
+                _logging().critical("Invalid -O argument: must be a positive integer")
                 sys.exit(1)
 
         elif option in ("-s", "--output-separator"):
             if parameters["Command flavour"] in ("unix", "unix:v10"):
-                logging.critical(
+                _logging().critical(
                     "Looking for symbol strings in the symbol table of an a.out object file is not implemented"
                 )
                 sys.exit(1)
@@ -542,7 +675,7 @@ def _process_command_line():
 
         elif option in ("-t", "--radix"):
             if parameters["Command flavour"] in ("unix", "unix:v10"):
-                logging.critical(
+                _logging().critical(
                     "Looking for strings in the text segment of an a.out object file is not implemented"
                 )
                 sys.exit(1)
@@ -554,12 +687,12 @@ def _process_command_line():
             elif argument.lower() == "x":
                 parameters["Print offset"] = "hexadecimal"
             else:
-                logging.critical("Invalid -t argument: must be (d)ecimal, (o)ctal or he(x)adecimal")
+                _logging().critical("Invalid -t argument: must be (d)ecimal, (o)ctal or he(x)adecimal")
                 sys.exit(1)
 
         elif option in ("-T", "--target"):
             # a.out, COFF, ELF
-            logging.critical("Specifying an object code format is not implemented")
+            _logging().critical("Specifying an object code format is not implemented")
             sys.exit(1)
 
         elif option in ("-v", "-V", "--version"):
@@ -577,10 +710,14 @@ def _process_command_line():
                 numeric_option_encountered = True
                 parameters["Minimum length"] = int(option[1])
 
-    logging.debug("_process_command_line(): parameters:")
-    logging.debug(parameters)
-    logging.debug("_process_command_line(): remaining_arguments:")
-    logging.debug(remaining_arguments)
+    # Make the pieces of very long strings end where their printed lines would be split:
+    if parameters["Split long lines"] < parameters["Maximum length"]:
+        parameters["Maximum length"] -= parameters["Maximum length"] % parameters["Split long lines"]
+
+    _debug("_process_command_line(): parameters:")
+    _debug(parameters)
+    _debug("_process_command_line(): remaining_arguments:")
+    _debug(remaining_arguments)
 
     return remaining_arguments
 
@@ -588,7 +725,7 @@ def _process_command_line():
 ################################################################################
 def _is_character_printable(value, encoding, include_backspaces, include_whitespaces):
     """Return true if chr(value) is a printable character according to strings"""
-    if value >= 0:
+    if 0 <= value <= sys.maxunicode:
         if value <= 127:
             if chr(value).isprintable() \
             or value == ord("\t") \
@@ -604,115 +741,510 @@ def _is_character_printable(value, encoding, include_backspaces, include_whitesp
 
 
 ################################################################################
-def _strings(
-    filename,
-    encoding,
-    minimum_length,
-    include_backspaces,
-    include_whitespaces,
-    string_termination,
-    file_offset,
-    file_length
-):
-    """Return a list of strings of printable characters in a file, file segment or input stream"""
-    bytes_to_read = 1
-    unpack_string = "B"
-    if encoding == "l":
-        bytes_to_read = 2
-        unpack_string = "<H"
-    elif encoding == "b":
-        bytes_to_read = 2
-        unpack_string = ">H"
-    elif encoding == "L":
-        bytes_to_read = 4
-        unpack_string = "<L"
-    elif encoding == "B":
-        bytes_to_read = 4
-        unpack_string = ">L"
-
-    printable_string = ""
-    results = []
+def _get_printable_table(encoding, include_backspaces, include_whitespaces):
+    """Return a table telling if each single byte value is a printable character"""
+    key = (encoding, include_backspaces, include_whitespaces)
+    if key not in _printable_tables:
+        _printable_tables[key] = bytes(
+            _is_character_printable(value, encoding, include_backspaces, include_whitespaces)
+            for value in range(256)
+        )
 
-    if filename:
-        try:
-            file = open(filename, "rb")
-        except:
-            return results
-    else:
-        file = sys.stdin.buffer
+    return _printable_tables[key]
 
+
+################################################################################
+def _read_file_segment(file, file_offset, file_length):
+    """Yield the (offset, blocks of bytes) of a file segment, using positioned reads"""
+    end_offset = file_offset + file_length
     offset = file_offset
-    if file_offset != 0:
-        file.seek(offset, 1)
-    total_extra_bytes = 0
-    bytes_buffer = b""
-    bytes_read = file.read(bytes_to_read)
-    while bytes_read:
-        value = struct.unpack(unpack_string, bytes_read)[0]
-        extra_bytes = 0
-        if encoding == "u":
-            if value >= 192 and value <= 223: # 110xxxxx => 2 bytes UTF-8 character
-                extra_bytes = 1
-            elif value >= 224 and value <= 239: # 1110xxxx => 3 bytes UTF-8 character
-                extra_bytes = 2
-            elif value >= 240 and value <= 247: # 11110xxx => 4 bytes UTF-8 character
-                extra_bytes = 3
-            if extra_bytes:
-                if bytes_buffer:
-                    if extra_bytes <= len(bytes_buffer):
-                        bytes = bytes_read + bytes_buffer[:extra_bytes]
-                        bytes_buffer = bytes_buffer[extra_bytes:]
-                    else:
-                        bytes = bytes_read + bytes_buffer + file.read(extra_bytes - len(bytes_buffer))
-                        bytes_buffer = b""
-                else:
-                    bytes = bytes_read + file.read(extra_bytes)
-                try:
-                    value = ord(bytes.decode("utf-8", "ignore"))
-                except TypeError:
-                    # The bytes read were not part of an UTF-8 character!
-                    if filename:
-                        file.seek(- extra_bytes, 1)
-                    else:
-                        # We can't seek back in a stream
-                        # Let's do this painful buffer handling stuff instead...
-                        bytes_buffer = bytes[1:]
-                    extra_bytes = 0
-
-        if _is_character_printable(value, encoding, include_backspaces, include_whitespaces):
-            printable_string += chr(value)
-            total_extra_bytes += extra_bytes
+    descriptor = None
+    if hasattr(os, "pread"):
+        try:
+            descriptor = file.fileno()
+        except (AttributeError, OSError):
+            # Not a real file
+            pass
+    if descriptor is None:
+        file.seek(offset)
+    while offset < end_offset:
+        bytes_to_read = min(_BLOCK_SIZE, end_offset - offset)
+        if descriptor is None:
+            block = file.read(bytes_to_read)
         else:
-            length = len(printable_string)
-            if length >= minimum_length:
-                if len(string_termination) == 0 \
-                or value in string_termination:
-                    logging.debug(
-                        "Offset=%d  String=%s  Delimiter=%d",
-                        offset - length - total_extra_bytes,
-                        printable_string,
-                        value
-                    )
-                    results.append([offset - length - total_extra_bytes, printable_string])
-            printable_string = ""
-            total_extra_bytes = 0
-
-        offset += bytes_to_read + extra_bytes
-        if offset >= file_offset + file_length:
-            bytes_read = b""
-        elif bytes_buffer:
-            bytes_read = bytes_buffer[:1]
-            bytes_buffer = bytes_buffer[1:]
+            block = os.pread(descriptor, bytes_to_read, offset)
+        if not block:
+            break
+        yield offset, block
+        offset += len(block)
+
+
+################################################################################
+def _read_stream_segment(stream, stream_offset, file_offset, file_length):
+    """Yield the (offset, blocks of bytes) of a stream segment, discarding the bytes before it in bulk"""
+    while stream_offset < file_offset:
+        block = stream.read(min(_BLOCK_SIZE, file_offset - stream_offset))
+        if not block:
+            return
+        stream_offset += len(block)
+    end_offset = file_offset + file_length
+    while stream_offset < end_offset:
+        block = stream.read(min(_BLOCK_SIZE, end_offset - stream_offset))
+        if not block:
+            break
+        yield stream_offset, block
+        stream_offset += len(block)
+
+
+################################################################################
+def _read_buffer_segment(view, file_offset, file_length):
+    """Yield the (offset, memoryview blocks) of an in-memory buffer segment, without copying it"""
+    # The segment is cut in blocks like files, so that strings are yielded as they are found
+    end_offset = min(file_offset + file_length, len(view))
+    offset = file_offset
+    while offset < end_offset:
+        block = view[offset:min(offset + _BLOCK_SIZE, end_offset)]
+        yield offset, block
+        offset += len(block)
+
+
+################################################################################
+def _get_entropy(block):
+    """Return the Shannon entropy of a block of bytes, in bits per byte"""
+    import collections
+    import math
+
+    entropy = 0.0
+    for count in collections.Counter(block).values():
+        probability = count / len(block)
+        entropy -= probability * math.log2(probability)
+
+    return entropy
+
+
+################################################################################
+def _add_skipped_range(skipped_ranges, offset, length):
+    """Append an [offset, length] range to skipped_ranges, merging it with the previous one if contiguous"""
+    if skipped_ranges and sum(skipped_ranges[-1]) == offset:
+        skipped_ranges[-1][1] += length
+    else:
+        skipped_ranges.append([offset, length])
+
+
+################################################################################
+def _skip_high_entropy_blocks(blocks, entropy_threshold, skipped_ranges):
+    """Yield the (offset, blocks of bytes) not looking like compressed or encrypted data"""
+    # The entropy is measured on windows at fixed offsets from the segment start, whatever
+    # the size of the blocks read, so the bytes of a window straddling blocks are held
+    window_pieces = [] # the (offset, bytes) of a window straddling blocks
+    window_length = 0
+    for offset, block in blocks:
+        block = memoryview(block) # for slicing without copying
+        start = 0
+        kept_start = 0
+        if window_pieces:
+            start = min(_ENTROPY_BLOCK_SIZE - window_length, len(block))
+            window_pieces.append((offset, block[:start]))
+            window_length += start
+            if window_length < _ENTROPY_BLOCK_SIZE:
+                continue
+
+            window = b"".join([bytes(piece) for _, piece in window_pieces])
+            if _get_entropy(window) > entropy_threshold:
+                _add_skipped_range(skipped_ranges, window_pieces[0][0], window_length)
+                kept_start = start
+            else:
+                # The piece in this block is yielded along with the rest of the block
+                for piece_offset, piece in window_pieces[:-1]:
+                    yield piece_offset, piece
+            window_pieces = []
+            window_length = 0
+
+        while start + _ENTROPY_BLOCK_SIZE <= len(block):
+            end = start + _ENTROPY_BLOCK_SIZE
+            if _get_entropy(block[start:end]) > entropy_threshold:
+                if kept_start < start:
+                    yield offset + kept_start, block[kept_start:start]
+                kept_start = end
+                _add_skipped_range(skipped_ranges, offset + start, end - start)
+            start = end
+        if kept_start < start:
+            yield offset + kept_start, block[kept_start:start]
+
+        if start < len(block):
+            window_pieces.append((offset + start, block[start:]))
+            window_length = len(block) - start
+
+    # The last window of the segment can be shorter
+    if window_pieces:
+        window = b"".join([bytes(piece) for _, piece in window_pieces])
+        if _get_entropy(window) > entropy_threshold:
+            _add_skipped_range(skipped_ranges, window_pieces[0][0], window_length)
         else:
-            bytes_read = file.read(bytes_to_read)
+            for piece_offset, piece in window_pieces:
+                yield piece_offset, piece
 
-    file.close()
 
-    return results
+################################################################################
+class Scanner:
+    """A reusable strings scanner, with its configuration and tables computed once
+
+    A Scanner doesn't use the global parameters and doesn't change after its creation,
+    all the scanning state being local to each call. It can thus be shared between threads.
+    """
+
+    # pylint: disable=R0902, R0913
+    def __init__(
+        self,
+        encoding="s",
+        minimum_length=4,
+        include_backspaces=False,
+        include_whitespaces=False,
+        string_termination=None,
+        all_alignments=False,
+        maximum_length=1048576,
+        entropy_threshold=0
+    ):
+        """Check and precompute the scanning configuration"""
+        if encoding not in ("s", "S", "l", "b", "L", "B", "u"):
+            raise ValueError("Invalid encoding: must be one of {s, S, l, b, L, B, u}")
+        if minimum_length < 1:
+            raise ValueError("Invalid minimum length: must be a positive integer")
+        if entropy_threshold < 0 or entropy_threshold > 8:
+            raise ValueError("Invalid entropy threshold: must be a number between 0 and 8")
+
+        self.encoding = encoding
+        self.minimum_length = minimum_length
+        self.include_backspaces = include_backspaces
+        self.include_whitespaces = include_whitespaces
+        if string_termination is None:
+            string_termination = []
+        self.string_termination = frozenset(string_termination)
+        self.all_alignments = all_alignments
+        self.maximum_length = max(maximum_length, minimum_length)
+        self.entropy_threshold = entropy_threshold
+
+        self._bytes_to_read = 1
+        self._unpack_from = None
+        if encoding in ("l", "b", "L", "B"):
+            import struct
+
+            unpack_string = {"l": "<H", "b": ">H", "L": "<L", "B": ">L"}[encoding]
+            self._bytes_to_read = struct.calcsize(unpack_string)
+            self._unpack_from = struct.Struct(unpack_string).unpack_from
+        self._printable_table = _get_printable_table(
+            encoding, include_backspaces, include_whitespaces
+        )
+
+        # Wide characters can be searched at all the possible alignments in the same pass,
+        # each alignment having its own string in the making
+        self._alignments = 1
+        if all_alignments:
+            self._alignments = self._bytes_to_read
+    # pylint: enable=R0913
+
+    ############################################################################
+    def _new_buffer(self, buffer_size=_STRING_BUFFER_SIZE):
+        """Return a buffer for a string in the making"""
+        # Strings are accumulated in a preallocated buffer, as code points for multi-byte
+        # encodings, in order to avoid repeated concatenations and to bound memory use.
+        # A memoryview of unsigned ints spares loading the array module, and its collections
+        buffer_size = min(buffer_size, self.maximum_length)
+        if self.encoding in ("s", "S"):
+            return bytearray(buffer_size)
+        return memoryview(bytearray(4 * buffer_size)).cast("I")
+
+    ############################################################################
+    def _grow_buffer(self, buffer):
+        """Return a buffer twice as large as another one, up to maximum_length, with its contents"""
+        if self.encoding in ("s", "S"):
+            buffer.extend(buffer[:self.maximum_length - len(buffer)])
+            return buffer
+        new_buffer = self._new_buffer(2 * len(buffer))
+        new_buffer[:len(buffer)] = buffer
+        return new_buffer
+
+    ############################################################################
+    def _buffer_to_string(self, buffer, length):
+        """Return the string in the making held in a buffer"""
+        if self.encoding in ("s", "S"):
+            return buffer[:length].decode("latin-1")
+        if sys.byteorder == "little":
+            return buffer[:length].tobytes().decode("utf-32-le")
+        return buffer[:length].tobytes().decode("utf-32-be")
+
+    ############################################################################
+    def _iter_blocks(self, blocks, cut_offsets=None):
+        """Yield the strings of printable characters in the (offset, blocks of bytes) of a segment"""
+        # pylint: disable=R0912, R0914, R0915
+        encoding = self.encoding
+        minimum_length = self.minimum_length
+        maximum_length = self.maximum_length
+        string_termination = self.string_termination
+        bytes_to_read = self._bytes_to_read
+        unpack_from = self._unpack_from
+        printable_table = self._printable_table
+        alignments = self._alignments
+        buffer_to_string = self._buffer_to_string
+
+        buffers = [self._new_buffer() for _ in range(alignments)]
+        string_lengths = [0] * alignments
+        string_offsets = [0] * alignments
+        continued_strings = [False] * alignments # pieces of a string longer than maximum_length
+        next_offsets = [0] * alignments
+        found_strings = [] # [offset, string, is_cut] held until they can be yielded in offset order
+
+        segment_offset = None
+        data = b""
+        data_offset = 0
+        position = 0
+        blocks = iter(blocks)
+        next_block = next(blocks, None)
+        while next_block:
+            block_offset, block = next_block
+            chunks = [] # the (data, data_offset, limit) to scan
+            if segment_offset is not None and block_offset == data_offset + len(data):
+                # Characters can straddle two blocks, so we carry over the unprocessed bytes
+                carried_bytes = bytes(data[position:])
+                if not carried_bytes:
+                    data_offset = block_offset
+                    data = block
+                elif len(block) >= 3:
+                    # The characters starting in the carried over bytes are scanned in a seam
+                    # made of them and of the first bytes of the block, sparing a copy of the block
+                    chunks.append(
+                        (carried_bytes + bytes(block[:3]), data_offset + position, len(carried_bytes))
+                    )
+                    data_offset = block_offset
+                    data = block
+                else:
+                    data_offset += position
+                    data = carried_bytes + bytes(block)
+            else:
+                if segment_offset is None:
+                    segment_offset = block_offset
+                # The bytes in between were skipped, which ends the current strings
+                for alignment in range(alignments):
+                    length = string_lengths[alignment]
+                    if (length >= minimum_length and len(string_termination) == 0) \
+                    or (length and continued_strings[alignment]):
+                        found_strings.append(
+                            [string_offsets[alignment], buffer_to_string(buffers[alignment], length), False]
+                        )
+                    string_lengths[alignment] = 0
+                    continued_strings[alignment] = False
+                    next_offsets[alignment] = block_offset \
+                        + (segment_offset + alignment - block_offset) % bytes_to_read
+                data_offset = block_offset
+                data = block
+            next_block = next(blocks, None)
+            if next_block and next_block[0] == data_offset + len(data):
+                limit = len(data) - 3 # a character is at most 4 bytes long
+            else:
+                limit = len(data) - bytes_to_read + 1
+            chunks.append((data, data_offset, limit))
+
+            # The block comes last, so data and data_offset still refer to it after this loop
+            for data, data_offset, limit in chunks:
+                for alignment in range(alignments):
+                    buffer = buffers[alignment]
+                    length = string_lengths[alignment]
+                    string_offset = string_offsets[alignment]
+                    is_continued = continued_strings[alignment]
+                    position = next_offsets[alignment] - data_offset
+                    while position < limit:
+                        if bytes_to_read == 1:
+                            value = data[position]
+                        else:
+                            value = unpack_from(data, position)[0]
+                        extra_bytes = 0
+                        if encoding == "u":
+                            if value >= 192 and value <= 223: # 110xxxxx => 2 bytes UTF-8 character
+                                extra_bytes = 1
+                            elif value >= 224 and value <= 239: # 1110xxxx => 3 bytes UTF-8 character
+                                extra_bytes = 2
+                            elif value >= 240 and value <= 247: # 11110xxx => 4 bytes UTF-8 character
+                                extra_bytes = 3
+                            if extra_bytes:
+                                character_bytes = bytes(data[position:position + 1 + extra_bytes])
+                                try:
+                                    value = ord(character_bytes.decode("utf-8", "ignore"))
+                                except TypeError:
+                                    # The bytes read were not part of an UTF-8 character!
+                                    extra_bytes = 0
+
+                        if value < 256:
+                            is_printable = printable_table[value]
+                        else:
+                            is_printable = _is_character_printable(
+                                value, encoding, self.include_backspaces, self.include_whitespaces
+                            )
+                        if is_printable:
+                            if length == maximum_length:
+                                # Without waiting for its delimiter, we output this piece of a long string,
+                                # now that we know that it goes on
+                                found_strings.append([string_offset, buffer_to_string(buffer, length), True])
+                                length = 0
+                                is_continued = True
+                            if not length:
+                                string_offset = data_offset + position
+                            buffer[length] = value
+                            length += 1
+                            if length == len(buffer) and length < maximum_length:
+                                # The buffer grows by doubling, up to maximum_length
+                                buffer = self._grow_buffer(buffer)
+                                buffers[alignment] = buffer
+                        else:
+                            if length >= minimum_length or (length and is_continued):
+                                if len(string_termination) == 0 \
+                                or value in string_termination \
+                                or is_continued:
+                                    printable_string = buffer_to_string(buffer, length)
+                                    _debug(
+                                        "Offset=%d  String=%s  Delimiter=%d",
+                                        string_offset,
+                                        printable_string,
+                                        value
+                                    )
+                                    found_strings.append([string_offset, printable_string, False])
+                            length = 0
+                            is_continued = False
+
+                        position += bytes_to_read + extra_bytes
+                    string_lengths[alignment] = length
+                    string_offsets[alignment] = string_offset
+                    continued_strings[alignment] = is_continued
+                    next_offsets[alignment] = data_offset + position
+            position = min(next_offsets) - data_offset
+
+            # Strings starting after a string still in the making must wait for it
+            found_strings.sort()
+            ready_strings = len(found_strings)
+            for alignment in range(alignments):
+                if string_lengths[alignment]:
+                    while ready_strings and found_strings[ready_strings - 1][0] > string_offsets[alignment]:
+                        ready_strings -= 1
+            for offset, printable_string, is_cut in found_strings[:ready_strings]:
+                if is_cut and cut_offsets is not None:
+                    cut_offsets.append(offset)
+                yield [offset, printable_string]
+            found_strings = found_strings[ready_strings:]
+
+        # The end of a long string already partially output
+        for alignment in range(alignments):
+            if string_lengths[alignment] and continued_strings[alignment]:
+                found_strings.append(
+                    [
+                        string_offsets[alignment],
+                        buffer_to_string(buffers[alignment], string_lengths[alignment]),
+                        False
+                    ]
+                )
+        found_strings.sort()
+
+        for offset, printable_string, is_cut in found_strings:
+            if is_cut and cut_offsets is not None:
+                cut_offsets.append(offset)
+            yield [offset, printable_string]
+        # pylint: enable=R0912, R0914, R0915
+
+    ############################################################################
+    def _iter_segment(self, blocks, skipped_ranges, cut_offsets):
+        """Yield the strings of printable characters in the (offset, blocks of bytes) of a segment,
+        after skipping the high entropy blocks"""
+        if self.entropy_threshold:
+            blocks = _skip_high_entropy_blocks(blocks, self.entropy_threshold, skipped_ranges)
+
+        for result in self._iter_blocks(blocks, cut_offsets):
+            yield result
+
+    ############################################################################
+    def iter_stream(self, stream, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Yield the strings of printable characters in a binary file object or stream
+
+        file_ranges is an optional list of (offset, length) segments to scan.
+        The [offset, length] of the high entropy blocks skipped are appended to skipped_ranges.
+        The offsets of the pieces of long strings continued in the next piece are appended
+        to cut_offsets, in the order the strings are yielded.
+        """
+        segments = [[0, sys.maxsize]]
+        if file_ranges:
+            segments = [[offset, length] for offset, length in file_ranges]
+        if skipped_ranges is None:
+            skipped_ranges = []
+
+        is_stream = not stream.seekable()
+        if is_stream:
+            # We can't seek back in a stream, so its segments are read in order
+            segments.sort()
+
+        stream_offset = 0
+        for offset, length in segments:
+            if is_stream:
+                if offset < stream_offset:
+                    # The beginning of this segment has already been consumed
+                    length -= stream_offset - offset
+                    offset = stream_offset
+                if length <= 0:
+                    continue
+                blocks = _read_stream_segment(stream, stream_offset, offset, length)
+                stream_offset = offset + length
+            else:
+                blocks = _read_file_segment(stream, offset, length)
+
+            for result in self._iter_segment(blocks, skipped_ranges, cut_offsets):
+                yield result
+
+        for offset, length in skipped_ranges:
+            _debug("Skipped high entropy range: Offset=%d  Length=%d", offset, length)
+
+    ############################################################################
+    def iter_file(self, filename, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Yield the strings of printable characters in a file"""
+        with open(filename, "rb") as file:
+            for result in self.iter_stream(file, file_ranges, skipped_ranges, cut_offsets):
+                yield result
+
+    ############################################################################
+    def iter_bytes(self, data, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Yield the strings of printable characters in a bytes-like object, without copying it
+
+        data can be any C-contiguous object supporting the buffer protocol, such as
+        bytes, bytearray, memoryview, array.array or mmap.mmap objects.
+        """
+        segments = [[0, sys.maxsize]]
+        if file_ranges:
+            segments = [[offset, length] for offset, length in file_ranges]
+        if skipped_ranges is None:
+            skipped_ranges = []
+
+        with memoryview(data) as view, view.cast("B") as byte_view:
+            for offset, length in segments:
+                blocks = _read_buffer_segment(byte_view, offset, length)
+                for result in self._iter_segment(blocks, skipped_ranges, cut_offsets):
+                    yield result
+
+        for offset, length in skipped_ranges:
+            _debug("Skipped high entropy range: Offset=%d  Length=%d", offset, length)
+
+    ############################################################################
+    def scan_stream(self, stream, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Return a list of strings of printable characters in a binary file object or stream"""
+        return list(self.iter_stream(stream, file_ranges, skipped_ranges, cut_offsets))
+
+    ############################################################################
+    def scan_file(self, filename, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Return a list of strings of printable characters in a file"""
+        return list(self.iter_file(filename, file_ranges, skipped_ranges, cut_offsets))
+
+    ############################################################################
+    def scan_bytes(self, data, file_ranges=None, skipped_ranges=None, cut_offsets=None):
+        """Return a list of strings of printable characters in a bytes-like object, without copying it"""
+        return list(self.iter_bytes(data, file_ranges, skipped_ranges, cut_offsets))
 
 
 ################################################################################
-def strings(
+def iter_strings(
     filename="",
     encoding=None,
     minimum_length=None,
@@ -722,9 +1254,16 @@ def strings(
     scan_entire_file=None,
     target=None,
     file_offset=None,
-    file_length=None
+    file_length=None,
+    file_ranges=None,
+    entropy_threshold=None,
+    skipped_ranges=None,
+    all_alignments=None,
+    maximum_length=None,
+    data=None,
+    cut_offsets=None
 ):
-    """Return a list of strings of printable characters in a file, file segment or input stream"""
+    """Yield the strings of printable characters in a file, file segments, input stream or buffer"""
     if encoding == None:
         encoding = parameters["Encoding"]
     if minimum_length == None:
@@ -743,44 +1282,116 @@ def strings(
         file_offset = parameters["Offset"]
     if file_length == None:
         file_length = parameters["Length"]
+    if entropy_threshold == None:
+        entropy_threshold = parameters["Entropy threshold"]
+    if all_alignments == None:
+        all_alignments = parameters["All alignments"]
+    if maximum_length == None:
+        maximum_length = parameters["Maximum length"]
 
     segments = []
-    if not filename or scan_entire_file:
+    if file_ranges:
+        for offset, length in file_ranges:
+            segments.append([offset, length])
+    elif scan_entire_file:
         segments.append([0, sys.maxsize])
     else:
-        if not target:
+        if filename and not target:
             # TODO Identify file type and set target
             pass
 
         if target == "part":
             segments.append([file_offset, file_length])
-        elif target == "ELF":
+        elif filename and target == "ELF":
             # TODO Process relevant segments of executable
             pass
-        elif target == "a.out":
+        elif filename and target == "a.out":
             # TODO Process relevant segments of executable
             pass
         else: # unidentified: scan entire file
             segments.append([0, sys.maxsize])
+    if not segments:
+        return
+
+    scanner = Scanner(
+        encoding,
+        minimum_length,
+        include_backspaces,
+        include_whitespaces,
+        string_termination,
+        all_alignments,
+        maximum_length,
+        entropy_threshold
+    )
+
+    if data is not None:
+        for result in scanner.iter_bytes(data, segments, skipped_ranges, cut_offsets):
+            yield result
+        return
 
-    all_results = []
-    for offset, length in segments:
-        all_results += _strings(
+    if filename:
+        try:
+            file = open(filename, "rb")
+        except:
+            return
+    else:
+        file = sys.stdin.buffer
+
+    try:
+        for result in scanner.iter_stream(file, segments, skipped_ranges, cut_offsets):
+            yield result
+    finally:
+        if filename:
+            file.close()
+
+
+################################################################################
+def strings(
+    filename="",
+    encoding=None,
+    minimum_length=None,
+    include_backspaces=None,
+    include_whitespaces=None,
+    string_termination=None,
+    scan_entire_file=None,
+    target=None,
+    file_offset=None,
+    file_length=None,
+    file_ranges=None,
+    entropy_threshold=None,
+    skipped_ranges=None,
+    all_alignments=None,
+    maximum_length=None,
+    data=None,
+    cut_offsets=None
+):
+    """Return a list of strings of printable characters in a file, file segments, input stream or buffer"""
+    return list(
+        iter_strings(
             filename,
             encoding,
             minimum_length,
             include_backspaces,
             include_whitespaces,
             string_termination,
-            offset,
-            length
+            scan_entire_file,
+            target,
+            file_offset,
+            file_length,
+            file_ranges,
+            entropy_threshold,
+            skipped_ranges,
+            all_alignments,
+            maximum_length,
+            data,
+            cut_offsets
         )
-    return all_results
+    )
 
 
 ################################################################################
-def _print_string(filename, offset, printable_string):
-    """Print the string, eventually splitting long lines"""
+def _print_string(filename, offset, printable_string, is_cut=False):
+    """Print the string, eventually splitting long lines or continuing on the next string"""
     maximum_length = parameters["Split long lines"]
     while len(printable_string):
         if parameters["Print filename"]:
@@ -792,7 +1403,8 @@ def _print_string(filename, offset, printable_string):
         elif parameters["Print offset"] == 'hexadecimal':
             print("{:>7x} ".format(offset), end="")
         print(printable_string[:maximum_length], end="")
-        if len(printable_string) > maximum_length:
+        if len(printable_string) > maximum_length \
+        or (is_cut and len(printable_string) <= maximum_length):
             print("...", end="")
         if parameters["Output separator"]:
             print("\n" + parameters["Output separator"])
@@ -804,30 +1416,51 @@ def _print_string(filename, offset, printable_string):
 
 
 ################################################################################
-def main():
-    """The program's main entry point"""
+def _print_strings(strings_function, filename=""):
+    """Print the strings of printable characters in a file or the standard input stream"""
+    cut_offsets = []
+    next_cut = 0 # the cut offsets come in the same order as the strings
+    for offset, printable_string in strings_function(filename, cut_offsets=cut_offsets):
+        is_cut = next_cut < len(cut_offsets) and cut_offsets[next_cut] == offset
+        if is_cut:
+            next_cut += 1
+        _print_string(filename or "{standard input}", offset, printable_string, is_cut)
+
+
+################################################################################
+def main(strings_function=strings):
+    """The program's main entry point, eventually using another strings() implementation"""
     program_name = os.path.basename(sys.argv[0])
 
-    _initialize_debugging(program_name)
-    _handle_signals()
-    _process_environment_variables()
-    arguments = _process_command_line()
-
-    exit_status = 0
-    if arguments:
-        for filename in arguments:
-            if os.path.isfile(filename):
-                for offset, printable_string in strings(filename):
-                    _print_string(filename, offset, printable_string)
-            elif filename == "-" \
-            and parameters["Command flavour"] in ("posix", "gnu", "gnu:linux", "linux"):
-                parameters["Scan entire file"] = True
-            else:
-                logging.error('"%s" is not a file name', filename)
+    # Catching the interrupt instead of handling SIGINT spares loading the signal module
+    try:
+        _initialize_debugging(program_name)
+        _process_environment_variables()
+        arguments = _process_command_line()
+
+        exit_status = 0
+        if arguments:
+            for filename in arguments:
+                if os.path.isfile(filename):
+                    try:
+                        _print_strings(strings_function, filename)
+                    except (OSError, ValueError) as error:
+                        _logging().error('"%s": %s', filename, error)
+                        exit_status = 1
+                elif filename == "-" \
+                and parameters["Command flavour"] in ("posix", "gnu", "gnu:linux", "linux"):
+                    parameters["Scan entire file"] = True
+                else:
+                    _logging().error('"%s" is not a file name', filename)
+                    exit_status = 1
+        else:
+            try:
+                _print_strings(strings_function)
+            except (OSError, ValueError) as error:
+                _logging().error("{standard input}: %s", error)
                 exit_status = 1
-    else:
-        for offset, printable_string in strings():
-            _print_string("{standard input}", offset, printable_string)
+    except KeyboardInterrupt:
+        _handle_interrupts()
 
     sys.exit(exit_status)
 
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+""" strings-server - serve strings requests on a Unix socket to amortize start up costs
+License: 3-clause BSD (see https://opensource.org/licenses/BSD-3-Clause)
+Author: Hubert Tournier
+
+Protocol:
+    A request is made of "name=value" lines mirroring the strings() parameters,
+    terminated by an empty line. The file name is sent as the hexadecimal digits
+    of its file system bytes, so that any name can be carried.
+    The response is a stream of frames:
+        "S offset length\\n" followed by the length bytes of an UTF-8 string
+        "C offset length\\n" likewise, for a piece of a long string continued in the next one
+        "E length\\n" followed by the length bytes of an UTF-8 error message
+        "K\\n" to end a successful response
+"""
+
+import os
+import socket
+import sys
+
+from .main import ID, parameters, strings, iter_strings, main
+from .main import _debug, _enable_debugging, _get_printable_table, _initialize_debugging, _logging
+
+# The type of each strings() parameter accepted in a request:
+REQUEST_PARAMETERS = {
+    "filename": "path",
+    "encoding": str,
+    "minimum_length": int,
+    "include_backspaces": bool,
+    "include_whitespaces": bool,
+    "string_termination": list,
+    "scan_entire_file": bool,
+    "target": str,
+    "file_offset": int,
+    "file_length": int,
+    "file_ranges": "ranges",
+    "entropy_threshold": float,
+    "all_alignments": bool,
+    "maximum_length": int,
+}
+
+
+################################################################################
+def get_socket_path():
+    """Return the path of the Unix socket used by the server"""
+    if "STRINGS_SOCKET" in os.environ:
+        return os.environ["STRINGS_SOCKET"]
+
+    directory = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+    return os.path.join(directory, "strings-{}.socket".format(os.getuid()))
+
+
+################################################################################
+def _encode_request(arguments):
+    """Return a request made from a dictionary of strings() arguments"""
+    request = ""
+    for name, value in arguments.items():
+        if value is None:
+            continue
+        if REQUEST_PARAMETERS[name] == bool:
+            value = int(value)
+        elif REQUEST_PARAMETERS[name] == list:
+            value = ":".join([str(item) for item in value])
+        elif REQUEST_PARAMETERS[name] == "ranges":
+            value = ":".join(["{},{}".format(offset, length) for offset, length in value])
+        elif REQUEST_PARAMETERS[name] == "path":
+            value = os.fsencode(value).hex()
+        value = str(value)
+        if "\n" in value:
+            raise ValueError("Newlines are not allowed in request parameters")
+        request += "{}={}\n".format(name, value)
+
+    return (request + "\n").encode("utf-8")
+
+
+################################################################################
+def _decode_request(lines):
+    """Return a dictionary of strings() arguments from the lines of a request"""
+    arguments = {}
+    for line in lines:
+        name, value = line.split("=", 1)
+        if name not in REQUEST_PARAMETERS:
+            raise ValueError("Unknown request parameter: {}".format(name))
+        if REQUEST_PARAMETERS[name] == bool:
+            arguments[name] = value == "1"
+        elif REQUEST_PARAMETERS[name] == list:
+            arguments[name] = [int(item) for item in value.split(":") if item]
+        elif REQUEST_PARAMETERS[name] == "ranges":
+            arguments[name] = []
+            for item in value.split(":"):
+                offset, length = item.split(",")
+                arguments[name].append([int(offset), int(length)])
+        elif REQUEST_PARAMETERS[name] == "path":
+            arguments[name] = os.fsdecode(bytes.fromhex(value))
+        else:
+            arguments[name] = REQUEST_PARAMETERS[name](value)
+
+    return arguments
+
+
+################################################################################
+def _handle_request(connection):
+    """Scan the file of a request and stream back the strings found"""
+    stream = connection.makefile("rwb")
+    try:
+        try:
+            lines = []
+            line = stream.readline().decode("utf-8").rstrip("\n")
+            while line:
+                lines.append(line)
+                line = stream.readline().decode("utf-8").rstrip("\n")
+
+            arguments = _decode_request(lines)
+            if not os.path.isfile(arguments.get("filename", "")):
+                raise ValueError('"{}" is not a file name'.format(arguments.get("filename", "")))
+            _debug("Request: %s", arguments)
+
+            cut_offsets = []
+            for offset, printable_string in iter_strings(cut_offsets=cut_offsets, **arguments):
+                payload = printable_string.encode("utf-8")
+                if cut_offsets and cut_offsets[-1] == offset:
+                    # The offset was appended for this very string, which is thus a cut piece
+                    cut_offsets.pop()
+                    stream.write(b"C %d %d\n" % (offset, len(payload)) + payload)
+                else:
+                    stream.write(b"S %d %d\n" % (offset, len(payload)) + payload)
+            stream.write(b"K\n")
+        except Exception as error: # pylint: disable=W0703
+            # Whatever goes wrong with a request, the worker must survive it
+            payload = str(error).encode("utf-8", "backslashreplace")
+            stream.write(b"E %d\n" % len(payload) + payload)
+        stream.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        # The client went away
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            # The client went away with unflushed data
+            pass
+        connection.close()
+
+
+################################################################################
+def _warm_up():
+    """Load the modules and build the tables used while scanning, once for all workers"""
+    # pylint: disable=W0611
+    import collections
+    import math
+    import struct
+    # pylint: enable=W0611
+
+    for encoding in ("s", "S", "l", "b", "L", "B", "u"):
+        for include_backspaces in (False, True):
+            for include_whitespaces in (False, True):
+                _get_printable_table(encoding, include_backspaces, include_whitespaces)
+
+
+################################################################################
+def _serve_forever(listener):
+    """Process requests, one after the other, for a worker"""
+    while True:
+        connection, _ = listener.accept()
+        _handle_request(connection)
+
+
+################################################################################
+def _start_worker(listener):
+    """Fork a worker process and return its process ID"""
+    import signal
+
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        exit_status = 0
+        try:
+            _serve_forever(listener)
+        except KeyboardInterrupt:
+            pass
+        except Exception as error: # pylint: disable=W0703
+            _logging().error("Worker %d stopped: %s", os.getpid(), error)
+            exit_status = 1
+        finally:
+            os._exit(exit_status)
+    return pid
+
+
+################################################################################
+def _remove_stale_socket(socket_path):
+    """Remove the socket left by a server that is gone, refusing to replace anything else"""
+    import stat
+
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError('"{}" exists and is not a socket'.format(socket_path))
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        # Nobody listens on it anymore
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError('A server is already listening on "{}"'.format(socket_path))
+
+
+################################################################################
+def serve(socket_path=None, workers=None):
+    """Serve strings requests on a Unix socket with a pool of pre-forked workers"""
+    import signal
+
+    if socket_path is None:
+        socket_path = get_socket_path()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    _remove_stale_socket(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(workers * 4)
+    _warm_up()
+
+    children = []
+    # Make sure the workers are stopped along with the server:
+    signal.signal(signal.SIGTERM, lambda signal_number, current_stack_frame: sys.exit(0))
+    try:
+        for _ in range(workers):
+            children.append(_start_worker(listener))
+        _debug("Serving on %s with %d workers", socket_path, workers)
+
+        # Workers that stopped are replaced, so that the server keeps its capacity
+        while True:
+            pid, _ = os.wait()
+            if pid in children:
+                children.remove(pid)
+                _debug("Worker %d exited, starting a new one", pid)
+                children.append(_start_worker(listener))
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        os.remove(socket_path)
+
+
+################################################################################
+def iter_remote_strings(filename, socket_path=None, cut_offsets=None, **arguments):
+    """Yield the strings of printable characters in a file, as scanned by a server
+
+    The offsets of the pieces of long strings continued in the next piece are appended
+    to cut_offsets, in the order the strings are yielded.
+    """
+    if socket_path is None:
+        socket_path = get_socket_path()
+    arguments["filename"] = os.path.abspath(filename)
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(socket_path)
+    stream = connection.makefile("rwb")
+    try:
+        stream.write(_encode_request(arguments))
+        stream.flush()
+
+        header = stream.readline().split()
+        while header and header[0] in (b"S", b"C"):
+            offset, length = int(header[1]), int(header[2])
+            payload = stream.read(length)
+            if len(payload) != length:
+                raise ConnectionError("Incomplete response from the strings server")
+            if header[0] == b"C" and cut_offsets is not None:
+                cut_offsets.append(offset)
+            yield [offset, payload.decode("utf-8")]
+            header = stream.readline().split()
+
+        if not header:
+            raise ConnectionError("Incomplete response from the strings server")
+        if header[0] == b"E":
+            raise ValueError(stream.read(int(header[1])).decode("utf-8"))
+    finally:
+        stream.close()
+        connection.close()
+
+
+################################################################################
+def _remote_strings(filename="", cut_offsets=None):
+    """Yield the strings of printable characters in a file, as scanned by a server if possible"""
+    if filename:
+        arguments = {
+            "encoding": parameters["Encoding"],
+            "minimum_length": parameters["Minimum length"],
+            "include_backspaces": parameters["Include backspaces"],
+            "include_whitespaces": parameters["Include whitespaces"],
+            "string_termination": parameters["String termination"],
+            "scan_entire_file": parameters["Scan entire file"],
+            "target": parameters["Target"],
+            "file_offset": parameters["Offset"],
+            "file_length": parameters["Length"],
+            "entropy_threshold": parameters["Entropy threshold"],
+            "all_alignments": parameters["All alignments"],
+            "maximum_length": parameters["Maximum length"],
+        }
+        results = iter_remote_strings(filename, cut_offsets=cut_offsets, **arguments)
+        try:
+            result = next(results, None)
+        except (AttributeError, OSError) as error:
+            # AttributeError is raised on systems without Unix sockets or user IDs
+            _debug("No strings server available (%s), scanning locally", error)
+        else:
+            # Errors in the server's response are left for the caller to report
+            while result is not None:
+                yield result
+                result = next(results, None)
+            return
+
+    # The standard input stream can't be handed over to the server
+    for result in strings(filename, cut_offsets=cut_offsets):
+        yield result
+
+
+################################################################################
+def _display_server_help():
+    """Displays usage and help"""
+    print("usage: strings-server [--debug] [-h|--help|-?] [-v|-V|--version]", file=sys.stderr)
+    print("       [-w|--workers NUM] [--] [socket]", file=sys.stderr)
+    print(
+        "  ----------------  ---------------------------------------------",
+        file=sys.stderr
+    )
+    print("  -w|--workers NUM  Use NUM worker processes", file=sys.stderr)
+    print("  --debug           Enable debug mode", file=sys.stderr)
+    print("  -h|--help|-?      Print a help message and exit", file=sys.stderr)
+    print("  -v|-V|--version   Print version and exit", file=sys.stderr)
+    print("  --                Options processing terminator", file=sys.stderr)
+    print(file=sys.stderr)
+
+
+################################################################################
+def server_main():
+    """The strings-server program's main entry point"""
+    import getopt
+
+    _initialize_debugging(os.path.basename(sys.argv[0]))
+
+    try:
+        options, remaining_arguments = getopt.getopt(
+            sys.argv[1:], "hvVw:?", ["debug", "help", "version", "workers="]
+        )
+    except getopt.GetoptError as error:
+        _logging().critical("Syntax error: %s", error)
+        _display_server_help()
+        sys.exit(1)
+
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+        _logging().critical("The server mode requires Unix sockets and fork()")
+        sys.exit(1)
+
+    workers = None
+    for option, argument in options:
+        if option == "--debug":
+            _enable_debugging()
+        elif option in ("-h", "--help", "-?"):
+            _display_server_help()
+            sys.exit(0)
+        elif option in ("-v", "-V", "--version"):
+            print(ID.replace("@(" + "#)" + " $" + "Id" + ": ", "").replace(" $", ""))
+            sys.exit(0)
+        elif option in ("-w", "--workers"):
+            try:
+                workers = int(argument)
+            except ValueError:
+                _logging().critical("Invalid -w argument: must be an integer")
+                sys.exit(1)
+            if workers < 1:
+                _logging().critical("Invalid -w argument: must be a positive integer")
+                sys.exit(1)
+
+    socket_path = None
+    if remaining_arguments:
+        socket_path = remaining_arguments[0]
+
+    try:
+        serve(socket_path, workers)
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        _logging().critical("Unable to serve: %s", error)
+        sys.exit(1)
+    sys.exit(0)
+
+
+################################################################################
+def client_main():
+    """The strings-client program's main entry point, a drop-in replacement for strings"""
+    main(_remote_strings)
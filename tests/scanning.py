@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+""" scanning - check that files, streams and buffers are scanned alike, whatever the blocks
+License: 3-clause BSD (see https://opensource.org/licenses/BSD-3-Clause)
+Author: Hubert Tournier
+"""
+
+import collections
+import importlib
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRECTORY, "..", "src"))
+
+# The package exports the main() function under the name of its module:
+strings_main = importlib.import_module("strings.main")
+Scanner = strings_main.Scanner
+
+ENCODINGS = ("s", "S", "l", "b", "L", "B", "u")
+BYTES_PER_CHARACTER = {"s": 1, "S": 1, "u": 1, "l": 2, "b": 2, "L": 4, "B": 4}
+
+# Several (offset, length) ranges per call, some of them running past the end of the data:
+RANGES = [[0, 1000], [1003, 50], [1500, 1501], [3990, 100000]]
+
+# Block sizes making characters and strings straddle many block boundaries:
+SMALL_BLOCK_SIZES = (3, 61)
+
+# Block sizes making the entropy windows straddle block boundaries:
+ENTROPY_BLOCK_SIZES = (61, 1000)
+ENTROPY_WINDOW_SIZE = 4096
+
+
+################################################################################
+class _ShortReadsStream(io.RawIOBase):
+    """A non seekable stream returning fewer bytes than requested, like a pipe"""
+
+    def __init__(self, data, seed):
+        self._data = data
+        self._position = 0
+        self._random = random.Random(seed)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self._random.randint(1, 97), len(self._data) - self._position)
+        buffer[:length] = self._data[self._position:self._position + length]
+        self._position += length
+        return length
+
+
+################################################################################
+def _make_data(seed, size):
+    """Return pseudo-random bytes mixing text in all encodings with binary data"""
+    generator = random.Random(seed)
+    words = ["Hello", "world", "strings", "déjà", "Ärger", "日本語", "😀emoji", "x" * 40]
+    codecs = ["ascii", "latin-1", "utf-8", "utf-16-le", "utf-16-be", "utf-32-le", "utf-32-be"]
+    data = bytearray()
+    while len(data) < size:
+        kind = generator.randrange(4)
+        if kind == 0:
+            data += bytes(generator.randrange(256) for _ in range(generator.randrange(1, 30)))
+        elif kind == 1:
+            data += generator.choice([b"\0", b"\n", b"\0\0\0", b"\t\r"])
+        else:
+            text = " ".join(generator.choice(words) for _ in range(generator.randrange(1, 6)))
+            data += text.encode(generator.choice(codecs), "replace")
+    return bytes(data[:size])
+
+
+################################################################################
+def _make_mixed_data(seed):
+    """Return text data interleaved with random data of high entropy"""
+    generator = random.Random(seed)
+    data = b""
+    for index, size in enumerate((5000, 9000, 3000, 7000, 4500, 6000, 2000)):
+        if index % 2:
+            data += bytes(generator.randrange(256) for _ in range(size))
+        else:
+            data += _make_data(seed + index, size)
+    return data
+
+
+################################################################################
+def _reference_runs(segment, segment_offset, options, skipped_ranges):
+    """Return the (start, end) runs of a segment kept after skipping its high entropy windows"""
+    threshold = options.get("entropy_threshold", 0)
+    runs = []
+    for start in range(0, len(segment), ENTROPY_WINDOW_SIZE):
+        window = segment[start:start + ENTROPY_WINDOW_SIZE]
+        entropy = 0.0
+        if threshold:
+            for count in collections.Counter(window).values():
+                entropy -= count / len(window) * math.log2(count / len(window))
+        if entropy > threshold:
+            if skipped_ranges and sum(skipped_ranges[-1]) == segment_offset + start:
+                skipped_ranges[-1][1] += len(window)
+            else:
+                skipped_ranges.append([segment_offset + start, len(window)])
+        elif runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], start + len(window))
+        else:
+            runs.append((start, start + len(window)))
+    return runs
+
+
+################################################################################
+def _reference_alignment(segment, segment_offset, alignment, options, ends_with_gap=False):
+    """Return the [offset, string, is_cut] found at an alignment of a segment, one character at a time"""
+    encoding = options["encoding"]
+    size = BYTES_PER_CHARACTER[encoding]
+    byteorder = "big" if encoding in ("b", "B") else "little"
+    maximum_length = max(options["maximum_length"], options["minimum_length"])
+
+    found = []
+    characters = []
+    start = 0
+    is_continued = False
+    position = alignment
+    while position + size <= len(segment):
+        value = int.from_bytes(segment[position:position + size], byteorder)
+        extra_bytes = 0
+        if encoding == "u" and 192 <= value <= 247:
+            extra_bytes = 1 if value <= 223 else 2 if value <= 239 else 3
+            try:
+                value = ord(segment[position:position + 1 + extra_bytes].decode("utf-8", "ignore"))
+            except TypeError:
+                extra_bytes = 0
+
+        # pylint: disable=W0212
+        if strings_main._is_character_printable(
+            value, encoding, options["include_backspaces"], options["include_whitespaces"]
+        ):
+        # pylint: enable=W0212
+            if len(characters) == maximum_length:
+                found.append([segment_offset + start, "".join(characters), True])
+                characters = []
+                is_continued = True
+            if not characters:
+                start = position
+            characters.append(chr(value))
+        else:
+            if len(characters) >= options["minimum_length"] or (characters and is_continued):
+                if not options["string_termination"] \
+                or value in options["string_termination"] \
+                or is_continued:
+                    found.append([segment_offset + start, "".join(characters), False])
+            characters = []
+            is_continued = False
+        position += size + extra_bytes
+
+    # Skipped bytes end strings like delimiters, but the end of the segment only ends long strings
+    if (characters and is_continued) \
+    or (ends_with_gap and len(characters) >= options["minimum_length"] and not options["string_termination"]):
+        found.append([segment_offset + start, "".join(characters), False])
+    return found
+
+
+################################################################################
+def _reference(data, ranges, options, skipped_ranges=None):
+    """Return the [offset, string, is_cut] expected for the ranges of some data"""
+    if skipped_ranges is None:
+        skipped_ranges = []
+    size = BYTES_PER_CHARACTER[options["encoding"]]
+    results = []
+    for offset, length in ranges:
+        segment = data[offset:offset + length]
+        runs = _reference_runs(segment, offset, options, skipped_ranges)
+        alignments = 1
+        if options["all_alignments"]:
+            alignments = size
+        found = []
+        for index, (start, end) in enumerate(runs):
+            for alignment in range(alignments):
+                found += _reference_alignment(
+                    segment[start:end],
+                    offset + start,
+                    (alignment - start) % size,
+                    options,
+                    ends_with_gap=index < len(runs) - 1
+                )
+        found.sort()
+        results += found
+    return results
+
+
+################################################################################
+def _scan(method, subject, ranges, skipped_ranges=None):
+    """Return the [offset, string, is_cut] found by a Scanner method"""
+    cut_offsets = []
+    results = method(subject, ranges, skipped_ranges, cut_offsets)
+    marked = []
+    next_cut = 0
+    for offset, printable_string in results:
+        is_cut = next_cut < len(cut_offsets) and cut_offsets[next_cut] == offset
+        if is_cut:
+            next_cut += 1
+        marked.append([offset, printable_string, is_cut])
+    return marked
+
+
+################################################################################
+def _check(name, expected, results):
+    """Report a difference between expected and actual results, returning False if any"""
+    if results == expected:
+        return True
+    for index, (wanted, got) in enumerate(zip(expected, results)):
+        if wanted != got:
+            print("FAILED {}: result #{}: expected {!r}, got {!r}".format(name, index, wanted, got))
+            return False
+    print("FAILED {}: expected {} results, got {}".format(name, len(expected), len(results)))
+    return False
+
+
+################################################################################
+def _check_scan(name, expected, expected_skipped_ranges, method, subject, ranges):
+    """Compare the results and skipped ranges of a Scanner method to the expected ones"""
+    skipped_ranges = []
+    results = _scan(method, subject, ranges, skipped_ranges)
+    return _check(name, expected, results) \
+        and _check("skipped ranges of " + name, expected_skipped_ranges, skipped_ranges)
+
+
+################################################################################
+def _check_configuration(data, filename, options, block_sizes):
+    """Compare the file, stream and buffer scans of some data to the reference, returning the failures"""
+    scanner = Scanner(**options)
+    failures = 0
+    for ranges in (None, RANGES):
+        skipped_ranges = []
+        expected = _reference(data, ranges or [[0, len(data)]], options, skipped_ranges)
+        for block_size in block_sizes:
+            strings_main._BLOCK_SIZE = block_size # pylint: disable=W0212
+            name = "{} ranges={} block size={}".format(options, ranges is not None, block_size)
+            with open(filename, "rb") as file:
+                failures += not _check_scan(
+                    "file " + name, expected, skipped_ranges, scanner.scan_stream, file, ranges
+                )
+            stream = _ShortReadsStream(data, block_size)
+            failures += not _check_scan(
+                "stream " + name, expected, skipped_ranges, scanner.scan_stream, stream, ranges
+            )
+            failures += not _check_scan(
+                "buffer " + name, expected, skipped_ranges, scanner.scan_bytes, data, ranges
+            )
+        name = "{} ranges={}".format(options, ranges is not None)
+        failures += not _check_scan(
+            "bytearray " + name, expected, skipped_ranges, scanner.scan_bytes, bytearray(data), ranges
+        )
+
+    return failures
+
+
+################################################################################
+def main():
+    """The program's main entry point"""
+    default_block_size = strings_main._BLOCK_SIZE # pylint: disable=W0212
+    failures = 0
+    checks = 0
+    with tempfile.TemporaryDirectory() as directory:
+        # Small data read in tiny blocks, for all the encodings and options
+        data = _make_data(1, 4096)
+        filename = os.path.join(directory, "small")
+        with open(filename, "wb") as file:
+            file.write(data)
+        for encoding in ENCODINGS:
+            for all_alignments in (False, True):
+                for maximum_length, minimum_length in ((1048576, 4), (5, 4), (13, 3), (3, 6)):
+                    for string_termination in ([], [0, 10]):
+                        options = {
+                            "encoding": encoding,
+                            "minimum_length": minimum_length,
+                            "include_backspaces": False,
+                            "include_whitespaces": bool(string_termination),
+                            "string_termination": string_termination,
+                            "all_alignments": all_alignments,
+                            "maximum_length": maximum_length,
+                        }
+                        failures += _check_configuration(data, filename, options, SMALL_BLOCK_SIZES)
+                        checks += 1
+
+        # Text interleaved with random data, whose high entropy windows are skipped
+        data = _make_mixed_data(2)
+        filename = os.path.join(directory, "mixed")
+        with open(filename, "wb") as file:
+            file.write(data)
+        for encoding, all_alignments in (("s", False), ("u", False), ("l", True), ("B", True)):
+            for string_termination in ([], [0, 10]):
+                options = {
+                    "encoding": encoding,
+                    "minimum_length": 4,
+                    "include_backspaces": False,
+                    "include_whitespaces": False,
+                    "string_termination": string_termination,
+                    "all_alignments": all_alignments,
+                    "maximum_length": 9,
+                    "entropy_threshold": 7.5,
+                }
+                failures += _check_configuration(data, filename, options, ENTROPY_BLOCK_SIZES)
+                checks += 1
+
+        # Text straddling a real block boundary, with UTF-8 and wide characters split across it
+        strings_main._BLOCK_SIZE = default_block_size # pylint: disable=W0212
+        data = bytearray(default_block_size + 4096)
+        middle = default_block_size
+        for offset, text, codec in (
+            (middle - 5, "aé日本語b", "utf-8"),
+            (middle + 83, "Hello world", "utf-16-le"),
+            (middle + 202, "Boundary", "utf-32-be"),
+        ):
+            encoded = text.encode(codec)
+            data[offset:offset + len(encoded)] = encoded
+        data[middle + 101:middle + 101 + 2] = b"\0\0"
+        data = bytes(data)
+        filename = os.path.join(directory, "large")
+        with open(filename, "wb") as file:
+            file.write(data)
+        for encoding in ENCODINGS:
+            for all_alignments in (False, True):
+                options = {
+                    "encoding": encoding,
+                    "minimum_length": 4,
+                    "include_backspaces": False,
+                    "include_whitespaces": False,
+                    "string_termination": [],
+                    "all_alignments": all_alignments,
+                    "maximum_length": 7,
+                }
+                scanner = Scanner(**options)
+                # Only zeros come before, so the reference can start close to the boundary
+                expected = _reference(data, [[middle - 4096, sys.maxsize]], options)
+                name = "{} across {} bytes".format(options, middle)
+                failures += not _check("file " + name, expected, _scan(scanner.scan_file, filename, None))
+                failures += not _check("buffer " + name, expected, _scan(scanner.scan_bytes, data, None))
+                checks += 1
+        if not _check("UTF-8 across the block boundary",
+                      [[middle - 5, "aé日本語b", False]],
+                      _scan(Scanner(encoding="u").scan_file, filename, None)):
+            failures += 1
+
+    print("{} configurations checked, {} failures".format(checks, failures))
+    if failures:
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+""" startup - measure the start up time of the strings command
+License: 3-clause BSD (see https://opensource.org/licenses/BSD-3-Clause)
+Author: Hubert Tournier
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+# Number of runs to measure:
+RUNS = 20
+
+# Maximum time, in milliseconds, that strings may add to the interpreter's own start up:
+BUDGET = float(os.environ.get("STARTUP_BUDGET", "10"))
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SOURCES = os.path.join(DIRECTORY, "..", "src")
+SAMPLE = os.path.join(DIRECTORY, "utf-8.txt")
+
+# The command is started like the strings console script, importing the package,
+# so that its bytecode is cached as in real use:
+COMMAND = "import sys; from strings import main; sys.exit(main())"
+
+# Command lines to time, as options load more code than a bare file name:
+ARGUMENTS = [
+    [SAMPLE],
+    ["-a", SAMPLE],
+    ["-n", "8", SAMPLE],
+    ["-e", "l", "-t", "x", "--all-alignments", SAMPLE],
+]
+
+
+################################################################################
+def _measure(arguments, environment=None):
+    """Return the median run time of a command, in milliseconds"""
+    # A first run, not measured, fills the caches (and compiles the bytecode)
+    subprocess.run(arguments, stdout=subprocess.DEVNULL, env=environment, check=True)
+
+    # The median is less sensitive than the average to the other processes' activity
+    durations = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(arguments, stdout=subprocess.DEVNULL, env=environment, check=True)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return durations[RUNS // 2]
+
+
+################################################################################
+def main():
+    """The program's main entry point"""
+    environment = dict(os.environ)
+    # Installed packages have their bytecode compiled, so it must be cached here too
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [SOURCES] + [path for path in [os.environ.get("PYTHONPATH")] if path]
+    )
+
+    interpreter = _measure([sys.executable, "-c", "pass"], environment)
+    print("Interpreter start up:   {:7.2f} ms".format(interpreter))
+
+    exceeded = False
+    for arguments in ARGUMENTS:
+        command = _measure([sys.executable, "-c", COMMAND] + arguments, environment)
+        overhead = command - interpreter
+        name = " ".join(["strings"] + arguments[:-1] + ["FILE"])
+        print("{}:".format(name))
+        print("  start up:             {:7.2f} ms".format(command))
+        print("  overhead:             {:7.2f} ms (budget: {:.2f} ms)".format(overhead, BUDGET))
+        if overhead > BUDGET:
+            exceeded = True
+
+    if exceeded:
+        print("Start up budget exceeded!", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()